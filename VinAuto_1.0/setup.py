@@ -9,6 +9,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         'pandas',
+        'numpy',
         'rdkit', 
         'wheel',
         'setuptools',
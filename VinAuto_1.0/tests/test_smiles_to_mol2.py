@@ -0,0 +1,18 @@
+import os
+import shutil
+
+import pytest
+
+from virtual_screening.converters import smiles_to_mol2
+
+pytestmark = pytest.mark.skipif(shutil.which("obabel") is None, reason="OpenBabel is not installed")
+
+
+def test_batch_with_an_invalid_smiles_in_the_middle(tmp_path):
+    # OpenBabel must go on after the invalid SMILES, instead of dropping the rest of the batch
+    molecules = [("CCO", "ethanol"), ("C1CC", "broken"), ("CCN", "001"), ("CCC", "propane")]
+
+    mol2_files = smiles_to_mol2.convert_smiles_batch_to_mol2(molecules, str(tmp_path), jobs=1)
+
+    assert sorted(os.path.basename(path) for path in mol2_files) == ["001.mol2", "ethanol.mol2", "propane.mol2"]
+    assert not (tmp_path / "broken.mol2").exists()
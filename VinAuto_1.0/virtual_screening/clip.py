@@ -1,5 +1,6 @@
 import argparse
 from virtual_screening.pipeline import run_pipeline
+from virtual_screening.utils import positive_int
 
 def main():
     parser = argparse.ArgumentParser(description="Virtual Screening using VINA")
@@ -9,9 +10,15 @@ def main():
     parser.add_argument("-n", "--num-poses", default=20, help="Number of docking poses for each ligand (default = 20)")
     parser.add_argument("-e", "--exhaustivness", default=10, help="exhaustivness (default = 10) the higher the better, but increases computational time")
     parser.add_argument("-p", "--padding", default=10, help="The extra space you wish to add to the calculated protein box (default = 10 Angstrom)")
+    parser.add_argument("-b", "--backend", choices=["obabel", "rdkit"], default="obabel", help="Tool generating the 3D coordinates of the ligands (default = obabel)")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=None, help="Number of ligand conversions and Vina runs executed in parallel (default = number of CPU cores)")
+    parser.add_argument("--ligand-prep", choices=["obabel", "meeko"], default="obabel", help="Tool converting the ligands to pdbqt: one obabel process per ligand (obabel), or in-process with RDKit and Meeko (meeko) (default = obabel)")
+    parser.add_argument("--engine", choices=["exe", "python"], default="exe", help="Run the Vina executable (exe) or dock in-process with the Vina Python API, from the vina package (python) (default = exe)")
+    parser.add_argument("--vina-exe", default=None, help="Path to the Vina executable (default = the VINA_EXE environment variable, else vina on the PATH, else the default Windows installation path)")
+    parser.add_argument("-f", "--force", action="store_true", help="Dock every ligand again, even the ones already docked by a previous run in the output directory")
 
     args = parser.parse_args()
-    run_pipeline(args.input_csv, args.input_receptor, args.output_dir, args.num_poses, args.exhaustivness, args.padding)
+    run_pipeline(args.input_csv, args.input_receptor, args.output_dir, args.num_poses, args.exhaustivness, args.padding, args.jobs, args.backend, args.force, args.engine, args.vina_exe, args.ligand_prep)
     
 if __name__ == "__main__":
     main()
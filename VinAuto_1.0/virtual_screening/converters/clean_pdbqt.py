@@ -1,3 +1,39 @@
+import re
+from functools import lru_cache
+
+from virtual_screening.utils import IO_BUFFER_SIZE
+
+@lru_cache(maxsize=None)
+def _residue_pattern(old_res: str) -> re.Pattern:
+    """
+    Compile (once per residue name) a regex matching the start of the ATOM and HETATM lines
+    whose residue name is old_res.
+    In PDBQT format, the residue name is in columns 18-20 (1-indexed), so it is
+    preceded by 13 characters after "ATOM" and by 11 characters after "HETATM".
+    """
+    name = old_res.encode()
+    # Every way old_res can be padded with spaces to fill the 3-character field
+    fields = [b" " * i + name + b" " * (3 - len(name) - i) for i in range(4 - len(name))]
+    # Names longer than the field leave the alternation empty, and "(?!)" never matches
+    alternatives = b"|".join(map(re.escape, fields)) or rb"(?!)"
+    return re.compile(rb"^(ATOM.{13}|HETATM.{11})(?:" + alternatives + rb")", re.M)
+
+def rename_residue_bytes(data: bytes, old_res: str = "UNL", new_res: str = "LIG") -> bytes:
+    """
+    Rename the residue of the ATOM and HETATM lines of PDBQT content from old_res to new_res.
+    
+    Args:
+        data (bytes): Content of a PDBQT file.
+        old_res (str): The residue name to replace (default "UNL").
+        new_res (str): The new residue name (default "LIG").
+    
+    Returns:
+        bytes: The modified content.
+    """
+    # A single substitution over the whole buffer, formatting new_res to 3 characters wide, right-aligned
+    replacement = rb"\g<1>" + f"{new_res:>3}".encode().replace(b"\\", b"\\\\")
+    return _residue_pattern(old_res).sub(replacement, data)
+
 def rename_ligand_residue(input_file: str, output_file: str = None, old_res: str = "UNL", new_res: str = "LIG") -> str:
     """
     Rename the residue in a PDBQT file from old_res to new_res. 
@@ -16,25 +52,18 @@ def rename_ligand_residue(input_file: str, output_file: str = None, old_res: str
     if output_file is None:
         output_file = input_file  # Overwrite in-place if no output file is provided
 
-    new_lines = []
-    with open(input_file, "r") as infile:
-        for line in infile:
-            # Process ATOM and HETATM lines
-            if line.startswith("ATOM") or line.startswith("HETATM"):
-                # In PDBQT format, the residue name is typically in columns 18-20 (1-indexed)
-                # Python string slicing (0-indexed): line[17:20]
-                residue = line[17:20]
-                if residue.strip() == old_res:
-                    # Replace with new_res, formatted to 3 characters wide, right-aligned
-                    new_line = line[:17] + f"{new_res:>3}" + line[20:]
-                    new_lines.append(new_line)
-                else:
-                    new_lines.append(line)
-            else:
-                new_lines.append(line)
-
-    with open(output_file, "w") as outfile:
-        outfile.writelines(new_lines)
+    with open(input_file, "rb", buffering=IO_BUFFER_SIZE) as infile:
+        data = infile.read()
+
+    # A plain substring check is enough to tell that there is nothing to rename
+    renamed = rename_residue_bytes(data, old_res, new_res) if old_res.encode() in data else data
+
+    # Nothing was renamed (e.g. the residues already use new_res): leave the file untouched
+    if output_file == input_file and renamed == data:
+        return output_file
+
+    with open(output_file, "wb", buffering=IO_BUFFER_SIZE) as outfile:
+        outfile.write(renamed)
 
     return output_file
 
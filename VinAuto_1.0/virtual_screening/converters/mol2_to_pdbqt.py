@@ -1,55 +1,176 @@
 import os
 import subprocess
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Tools preparing the ligands: "obabel" runs one obabel process per ligand,
+# "meeko" prepares them in-process with RDKit and Meeko (optional dependency)
+_LIGAND_PREPS = ("obabel", "meeko")
+
+def _convert_one_mol2(mol2_path: str, output_folder: str, prepare_ligand_cmd: list, post_transform=None) -> str:
+    """
+    Convert a single MOL2 (or MOL) file into a PDBQT file.
+
+    Args:
+        mol2_path (str): Path to the .mol2 (or .mol) file.
+        output_folder (str): Directory where the .pdbqt file will be stored.
+        prepare_ligand_cmd (list): Command list for ligand preparation.
+        post_transform (callable): Optional function applied to the PDBQT content (bytes) before it is written.
+
+    Returns:
+        str: The path to the generated .pdbqt file, or None if the conversion failed.
+    """
+    base_name = os.path.splitext(os.path.basename(mol2_path))[0]
+    pdbqt_path = os.path.join(output_folder, f"{base_name}.pdbqt")
+
+    # obabel first_molecule.mol2 -opdbqt --partialcharge gasteiger
+    # (without -O, obabel writes the PDBQT to its stdout, which is written to the file once)
+    command = prepare_ligand_cmd + [
+        mol2_path,
+        "-opdbqt",
+        "--partialcharge", "gasteiger",
+        "--addHs"
+    ]
+
+    try:
+        result = subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Error converting {base_name}: {e}")
+        return None
+    pdbqt = result.stdout
+    if not pdbqt:
+        logging.error(f"Error converting {base_name}: {result.stderr.decode(errors='replace').strip()}")
+        return None
+
+    if post_transform is not None:
+        pdbqt = post_transform(pdbqt)
+    with open(pdbqt_path, "wb") as f:
+        f.write(pdbqt)
+    logging.debug(f"PDBQT generated for {base_name}")
+    return pdbqt_path
+
+def _convert_one_meeko(mol2_path: str, output_folder: str, post_transform=None) -> str:
+    """
+    Convert a single MOL2 (or MOL) file into a PDBQT file in-process, with RDKit and Meeko.
+
+    Args:
+        mol2_path (str): Path to the .mol2 (or .mol) file.
+        output_folder (str): Directory where the .pdbqt file will be stored.
+        post_transform (callable): Optional function applied to the PDBQT content (bytes) before it is written.
+
+    Returns:
+        str: The path to the generated .pdbqt file, or None if the conversion failed.
+    """
+    from rdkit import Chem
+    from meeko import MoleculePreparation
+    try:
+        from meeko import PDBQTWriterLegacy
+    except ImportError:  # Meeko < 0.5 writes the PDBQT from the preparation itself
+        PDBQTWriterLegacy = None
+
+    base_name = os.path.splitext(os.path.basename(mol2_path))[0]
+    pdbqt_path = os.path.join(output_folder, f"{base_name}.pdbqt")
+
+    try:
+        if mol2_path.lower().endswith(".mol2"):
+            mol = Chem.MolFromMol2File(mol2_path, removeHs=False)
+        else:
+            mol = Chem.MolFromMolFile(mol2_path, removeHs=False)
+        if mol is None:
+            raise ValueError("RDKit could not read the molecule")
+        # Meeko needs explicit hydrogens (as obabel's --addHs), with coordinates
+        mol = Chem.AddHs(mol, addCoords=True)
+
+        # Meeko assigns Gasteiger charges, as the obabel conversion does
+        preparator = MoleculePreparation()
+        if PDBQTWriterLegacy is None:
+            preparator.prepare(mol)
+            pdbqt_string = preparator.write_pdbqt_string()
+        else:
+            setups = preparator.prepare(mol)
+            pdbqt_string, is_ok, error_msg = PDBQTWriterLegacy.write_string(setups[0])
+            if not is_ok:
+                raise ValueError(error_msg)
+
+        pdbqt = pdbqt_string.encode("utf-8")
+        if post_transform is not None:
+            pdbqt = post_transform(pdbqt)
+        with open(pdbqt_path, "wb") as f:
+            f.write(pdbqt)
+        logging.debug(f"PDBQT generated for {base_name}")
+        return pdbqt_path
+    except Exception as e:
+        logging.error(f"Error converting {base_name}: {e}")
+        return None
 
 def convert_mol2_to_pdbqt(input_folder: str,
                           output_folder: str,
-                          prepare_ligand_cmd: list) -> list:
+                          prepare_ligand_cmd: list,
+                          jobs: int = None,
+                          ligand_prep: str = "obabel",
+                          post_transform=None) -> list:
     """
-    Convert all MOL2 files in the specified input folder into PDBQT files using the 
-    provided ligand preparation command with obabel.
+    Convert all MOL2 files (and MOL files, as written by the RDKit backend of smiles_to_mol2)
+    in the specified input folder into PDBQT files using the provided ligand preparation
+    command with obabel.
+    
+    With ligand_prep="meeko", the ligands are instead prepared in-process with RDKit and
+    Meeko, on a pool of processes, and prepare_ligand_cmd is not used.
     
     Args:
-        input_folder (str): Directory containing the .mol2 files.
+        input_folder (str): Directory containing the .mol2 (or .mol) files.
         output_folder (str): Directory where .pdbqt files will be stored.
         prepare_ligand_cmd (list): Command list for ligand preparation. This should
                                    include the interpreter and the full path to prepare_ligand4.py
                                    if necessary.
+        jobs (int): Number of conversions to run in parallel (default: number of CPU cores).
+        ligand_prep (str): Tool preparing the ligands, "obabel" (default) or "meeko".
+        post_transform (callable): Optional function applied to the content (bytes) of every PDBQT
+                                   file before it is written, e.g. clean_pdbqt.rename_residue_bytes.
+                                   With "meeko" it runs in the worker processes, so it must be picklable
+                                   (a module-level function).
     
     Returns:
         list: A list of paths to the generated .pdbqt files.
     """
+    if ligand_prep not in _LIGAND_PREPS:
+        raise ValueError(f"Unknown ligand preparation: {ligand_prep}")
+    if ligand_prep == "meeko":
+        # Fail here rather than in every worker process when the optional package is missing
+        try:
+            import meeko  # noqa: F401
+        except ImportError:
+            logging.error("The meeko ligand preparation needs the Meeko package: pip install meeko")
+            raise
+
     os.makedirs(output_folder, exist_ok=True)
-    pdbqt_files = []
-
-    # Process each MOL2 file in the input folder
-    for mol2_file in os.listdir(input_folder):
-        if mol2_file.lower().endswith(".mol2"):
-            mol2_path = os.path.join(input_folder, mol2_file)
-            base_name = os.path.splitext(mol2_file)[0]
-            pdbqt_path = os.path.join(output_folder, f"{base_name}.pdbqt")
-
-            # obabel first_molecule.mol2 -opdbqt -O first_molecule.pdbqt --partialcharge gasteiger
-            command = prepare_ligand_cmd + [
-                mol2_path,
-                "-opdbqt",
-                "-O", pdbqt_path,
-                "--partialcharge gasteiger",
-                "--addHs"
-            ]
-            
-
-            try:
-                subprocess.run(command, check=True, capture_output=True)
-                logging.info(f"PDBQT generated for {base_name}")
-                pdbqt_files.append(pdbqt_path)
-            except subprocess.CalledProcessError as e:
-                logging.error(f"Error converting {base_name}: {e}")
+
+    # DirEntry objects carry the full path and a cached file type, so no extra join or stat is needed
+    with os.scandir(input_folder) as entries:
+        mol2_paths = [entry.path for entry in entries
+                      if entry.is_file() and entry.name.lower().endswith((".mol2", ".mol"))]
+
+    if ligand_prep == "meeko":
+        # The preparation runs in Python and holds the GIL: it needs processes, not threads
+        workers = jobs or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_convert_one_meeko, mol2_paths, [output_folder] * len(mol2_paths),
+                                   [post_transform] * len(mol2_paths),
+                                   chunksize=max(1, len(mol2_paths) // (workers * 4)))
+            return [path for path in results if path is not None]
+
+    # Every conversion is an independent obabel process: threads are enough,
+    # since they only wait on the subprocesses
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        results = executor.map(lambda path: _convert_one_mol2(path, output_folder, prepare_ligand_cmd, post_transform),
+                               mol2_paths)
+        pdbqt_files = [path for path in results if path is not None]
 
     return pdbqt_files
 
 if __name__ == "__main__":
     import argparse
+    from virtual_screening.utils import positive_int
 
     parser = argparse.ArgumentParser(description="Convert MOL2 files to PDBQT format.")
     parser.add_argument("--input_folder", default="mol2_files", help="Folder containing MOL2 files.")
@@ -58,14 +179,18 @@ if __name__ == "__main__":
     # Instead of a fixed default, you can require the user to provide the full command,
     # or set a reasonable default if known. Here, we assume users might need to supply
     # a full command including the interpreter and path to prepare_ligand4.py.
+    parser.add_argument("--ligand_prep", choices=_LIGAND_PREPS, default="obabel",
+                        help="Tool preparing the ligands (default: obabel). meeko does not need --prepare_ligand_cmd.")
     parser.add_argument("--prepare_ligand_cmd", default="", 
                         help="Full command to run the ligand preparation script. For example:\n"
                              '"python C:\\Path\\to\\AutoDockTools\\Utilities24\\prepare_ligand4.py"')
+    parser.add_argument("--jobs", type=positive_int, default=None,
+                        help="Number of conversions to run in parallel (default: number of CPU cores).")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
     
-    if not args.prepare_ligand_cmd:
+    if not args.prepare_ligand_cmd and args.ligand_prep == "obabel":
         logging.error("You must supply the full command for the ligand preparation script using --prepare_ligand_cmd")
         exit(1)
     
@@ -73,5 +198,5 @@ if __name__ == "__main__":
     prepare_ligand_cmd = args.prepare_ligand_cmd.split()
 
     logging.info("Starting the MOL2 to PDBQT conversion process.")
-    converted_files = convert_mol2_to_pdbqt(args.input_folder, args.output_folder, prepare_ligand_cmd)
+    converted_files = convert_mol2_to_pdbqt(args.input_folder, args.output_folder, prepare_ligand_cmd, args.jobs, args.ligand_prep)
     logging.info(f"Conversion complete. Generated files: {converted_files}")
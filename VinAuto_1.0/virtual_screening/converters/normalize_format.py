@@ -1,5 +1,43 @@
 import re
 
+from virtual_screening.utils import IO_BUFFER_SIZE
+
+# Every byte outside the printable ASCII range (0x20-0x7E), except for \n and \r
+_NON_PRINTABLE = bytes(b for b in range(256) if not (0x20 <= b <= 0x7E or b in (0x0A, 0x0D)))
+_LINE_END = re.compile(rb'\r\n?')
+_TRAILING_SPACES = re.compile(rb' +$', re.M)
+_MODEL_INDENT = re.compile(rb'^ +(?=MODEL|ENDMDL)', re.M)
+
+def normalize_pdbqt_bytes(content: bytes) -> bytes:
+    """
+    Normalize PDBQT content: remove non-printable characters, trim extra leading spaces
+    on MODEL/ENDMDL lines and trailing spaces on every line, and use Windows CRLF newlines.
+    
+    Args:
+        content (bytes): Content of a PDBQT file.
+    
+    Returns:
+        bytes: The normalized content.
+    """
+    # Remove non-printable characters except for newline (\n) and carriage-return (\r)
+    # (this also drops every byte of non-ASCII UTF-8 sequences)
+    content = content.translate(None, _NON_PRINTABLE)
+
+    # Bring every line ending to \n (terminating the last line as well),
+    # so that the line-based patterns below see all the lines
+    content = _LINE_END.sub(b'\n', content)
+    if not content.endswith(b'\n'):
+        content += b'\n'
+
+    # Remove trailing whitespace, and extra leading whitespace for lines starting with "MODEL" or "ENDMDL"
+    content = _TRAILING_SPACES.sub(b'', content)
+    content = _MODEL_INDENT.sub(b'', content)
+
+    # Switch to Windows-style CRLF newlines
+    content = content.replace(b'\n', b'\r\n')
+
+    return content
+
 def normalize_pdbqt_format(input_file: str, output_file: str = None) -> str:
     """
     Read a Unix-formatted PDBQT file and rewrite it with Windows CRLF newlines,
@@ -19,32 +57,15 @@ def normalize_pdbqt_format(input_file: str, output_file: str = None) -> str:
     if output_file is None:
         output_file = input_file
 
-    # Read the file as binary and decode (this helps remove any problematic BOMs or hidden bytes)
-    with open(input_file, 'rb') as f:
+    # Read the file as binary (this helps remove any problematic BOMs or hidden bytes)
+    with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
         content = f.read()
 
-    # Decode using UTF-8, ignoring any errors
-    text = content.decode('utf-8', errors='ignore')
-
-    # Remove non-printable characters except for newline (\n) and carriage-return (\r)
-    # This regex keeps characters in the range space (0x20) to tilde (0x7E), plus \r and \n.
-    text = re.sub(r'[^\x20-\x7E\r\n]', '', text)
-
-    # Process each line:
-    cleaned_lines = []
-    for line in text.splitlines():
-        # Remove extra leading whitespace for lines starting with "MODEL" or "ENDMDL"
-        if line.lstrip().startswith("MODEL") or line.lstrip().startswith("ENDMDL"):
-            line = line.lstrip()
-        # Remove trailing whitespace as well
-        cleaned_lines.append(line.rstrip())
-
-    # Join lines with Windows-style CRLF newlines
-    new_text = "\r\n".join(cleaned_lines) + "\r\n"
+    content = normalize_pdbqt_bytes(content)
 
     # Write back with Windows newlines
-    with open(output_file, 'w', encoding='utf-8', newline='') as f:
-        f.write(new_text)
+    with open(output_file, 'wb', buffering=IO_BUFFER_SIZE) as f:
+        f.write(content)
 
     return output_file
 
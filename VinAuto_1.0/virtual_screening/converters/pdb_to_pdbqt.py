@@ -21,49 +21,31 @@ def convert_pdb_to_pdbqt(pdb_file: str, output_folder: str, obabel_exe: str = "o
     # Ensure the output folder exists
     os.makedirs(output_folder, exist_ok=True)
 
-    # generate charged pdb
-    base_name_1 = os.path.splitext(os.path.basename(pdb_file))[0]
-    base_name_2 = f"{base_name_1}_charged.pdb"
-    charged_pdb = os.path.join(str(output_folder),str(base_name_2))
-
-    # obabel 1rex.pdb -O 1rex_charged.pdb -xr -p 7.4
-
-    # generate charged pdb
-    pH = 7.4
-    comm = [obabel_exe, pdb_file, "-O", charged_pdb, "-xr", "-p", str(pH) ]
-
-    try:
-        result_1 = subprocess.run(comm, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        logging.info(f"Conversion successful. Output saved to: {charged_pdb}")
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error converting {pdb_file} to PDBQT:\n{e.stderr}")
-        raise e
-    
-# Generate the output file name based on the input file's base name.
+    # Generate the output file name based on the input file's base name.
     base_name = os.path.splitext(os.path.basename(pdb_file))[0]
     pdbqt_file = os.path.join(output_folder, f"{base_name}.pdbqt")
-    
-    # Build the command: obabel input.pdb -O output.pdbqt [optional extra args]
-    # Build the command including flags to reformat and add Gasteiger charges
-    # e.g. obabel 1rex_charged.pdb -O 1rex.pdbqt -xr --partialcharge gasteiger
-    command = [ obabel_exe, charged_pdb,"-O", pdbqt_file, "-xr", "--partialcharge", "gasteiger"]
-    
+
+    # obabel computes --partialcharge before applying -p, so a single run would leave the protons
+    # added for pH 7.4 uncharged: protonate first, then pipe the charged pdb into the run adding
+    # the Gasteiger charges, without writing any intermediate file
+    # e.g. obabel 1rex.pdb -opdb -xr -p 7.4 | obabel -ipdb -O 1rex.pdbqt -xr --partialcharge gasteiger
+    pH = 7.4
+    protonate_command = [obabel_exe, pdb_file, "-opdb", "-xr", "-p", str(pH)]
+    command = [obabel_exe, "-ipdb", "-O", pdbqt_file, "-xr", "--partialcharge", "gasteiger"]
 
     if extra_args:
         command.extend(extra_args)
 
-        if extra_args:
-            command.extend(extra_args)
-        
-    logging.info(f"Running OpenBabel command: {' '.join(command)}")
-        
+    logging.info(f"Running OpenBabel command: {' '.join(protonate_command)} | {' '.join(command)}")
+
     try:
-        result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result = subprocess.run(protonate_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        subprocess.run(command, input=result.stdout, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         logging.info(f"Conversion successful. Output saved to: {pdbqt_file}")
     except subprocess.CalledProcessError as e:
-        logging.error(f"Error converting {charged_pdb} to PDBQT:\n{e.stderr}")
+        logging.error(f"Error converting {pdb_file} to PDBQT:\n{e.stderr}")
         raise e
-        
+
     return pdbqt_file
 
 
@@ -1,57 +1,248 @@
 import os
-import re
 import subprocess
+import tempfile
 import logging
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+_MOL2_MOLECULE = b"@<TRIPOS>MOLECULE"
+_BACKENDS = ("obabel", "rdkit")
+
+@lru_cache(maxsize=None)
+def _etkdg_params():
+    """
+    ETKDG parameters, built once and shared by every embedding. The molecules are already
+    converted in parallel (one per thread), so each embedding runs on a single thread.
+    """
+    from rdkit.Chem import rdDistGeom
+
+    params = rdDistGeom.ETKDGv3()
+    params.randomSeed = 0xf00d
+    params.numThreads = 1
+    return params
 
 def clean_smiles(smiles: str) -> str:
     """
     Remove any parts after a '.' in the SMILES string.
     """
-    return re.sub(r'\..*$', '', smiles)
+    return smiles.split('.', 1)[0]
+
+def _sanitize_name(name) -> str:
+    """
+    Sanitize a molecule name to avoid invalid characters in file names.
+    """
+    return str(name).strip().replace('/', '_').replace('\\', '_').replace(':', '_')
+
+def _embed_with_rdkit(smiles: str, title: str, output_filename: str) -> None:
+    """
+    Generate a 3D conformer for a SMILES string with RDKit (ETKDG embedding followed by
+    a UFF optimization) and save it as an MDL molfile.
+    
+    Raises:
+        ValueError: If the SMILES cannot be parsed or embedded in 3D.
+    """
+    # RDKit is only needed by the "rdkit" backend
+    from rdkit import Chem
+    from rdkit.Chem import rdDistGeom, rdForceFieldHelpers
 
-def convert_smiles_to_mol2(smiles: str, name: str, output_dir: str, obabel_cmd: str = "obabel") -> str:
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError(f"RDKit could not parse the SMILES {smiles}")
+    
+    mol_h = Chem.AddHs(mol)
+    if rdDistGeom.EmbedMolecule(mol_h, _etkdg_params()) != 0:
+        raise ValueError(f"RDKit could not generate 3D coordinates for {smiles}")
+    rdForceFieldHelpers.UFFOptimizeMolecule(mol_h)
+    
+    mol_h.SetProp("_Name", title)
+    Chem.MolToMolFile(mol_h, output_filename)
+
+def convert_smiles_to_mol2(smiles: str, name: str, output_dir: str, obabel_cmd: str = "obabel",
+                           backend: str = "obabel") -> str:
     """
     Convert a given SMILES string to a MOL2 file using the OpenBabel command line tool.
     
+    With the "rdkit" backend the 3D conformer is generated in-process with RDKit instead,
+    and saved as an MDL molfile (.mol), since RDKit has no MOL2 writer.
+    
     Args:
         smiles: The raw SMILES string.
         name: Identifier used to name the output file.
         output_dir: Directory where the MOL2 file will be saved.
         obabel_cmd: Command for OpenBabel, can be modified if needed.
+        backend: Tool generating the 3D coordinates, "obabel" (default) or "rdkit".
     
     Returns:
-        The path to the generated MOL2 file.
+        The path to the generated MOL2 (or, with the "rdkit" backend, MOL) file.
     """
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    
     # Clean the SMILES
     cleaned_smiles = clean_smiles(smiles)
     
     # Sanitize the name to avoid invalid characters in file names
-    sanitized_name = str(name).strip().replace('/', '_').replace('\\', '_').replace(':', '_')
+    sanitized_name = _sanitize_name(name)
     
     # Ensure the output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
+    if backend == "rdkit":
+        output_filename = os.path.join(output_dir, f"{sanitized_name}.mol")
+        try:
+            _embed_with_rdkit(cleaned_smiles, sanitized_name, output_filename)
+            logging.debug(f"Converted and saved: {output_filename}")
+        except ValueError as e:
+            logging.error(f"Error converting SMILES {smiles} for {name} with RDKit: {e}")
+            raise e
+        return output_filename
+    
     # Define the output filename based on the sanitized name and the output directory
     output_filename = os.path.join(output_dir, f"{sanitized_name}.mol2")
     
     # Prepare the obabel command to generate the MOL2 file with 3D coordinates
-    command = f'{obabel_cmd} -:"{cleaned_smiles}" --gen3D -O "{output_filename}"'
+    # (an argument list runs obabel directly, without an intermediate shell)
+    command = [obabel_cmd, f"-:{cleaned_smiles}", "--gen3D", "-O", output_filename]
     
     try:
-        subprocess.run(command, shell=True, check=True, capture_output=True)
-        logging.info(f"Converted and saved: {output_filename}")
+        subprocess.run(command, check=True, capture_output=True)
+        logging.debug(f"Converted and saved: {output_filename}")
     except subprocess.CalledProcessError as e:
         logging.error(f"Error converting SMILES {smiles} for {name}. Command: {command}\nError: {e}")
         raise e
     
     return output_filename
 
+def _convert_single(smiles: str, name: str, output_dir: str, obabel_cmd: str, backend: str) -> str:
+    """
+    Convert a single molecule, logging (instead of raising) any failure.
+    
+    Returns:
+        The path to the generated file, or None if the conversion failed.
+    """
+    try:
+        return convert_smiles_to_mol2(smiles, name, output_dir, obabel_cmd, backend)
+    except Exception as e:
+        logging.error(f"Failed to convert {name}: {e}")
+        return None
+
+def _convert_batch(molecules: list, output_dir: str, obabel_cmd: str) -> list:
+    """
+    Convert a batch of molecules to MOL2 files with a single OpenBabel invocation.
+    
+    The SMILES are written to a temporary SMI file, using the sanitized names as titles.
+    OpenBabel writes every molecule to one multi-molecule MOL2 file, which is then
+    split into one file per molecule, named after its title. An invalid SMILES only
+    costs its own molecule, the rest of the batch is still converted.
+    
+    Args:
+        molecules: List of (smiles, name) pairs.
+        output_dir: Directory where the MOL2 files will be saved.
+        obabel_cmd: Command for OpenBabel.
+    
+    Returns:
+        A list of paths to the generated MOL2 files.
+    """
+    names = [_sanitize_name(name) for _, name in molecules]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        smi_file = os.path.join(tmp_dir, "batch.smi")
+        combined_file = os.path.join(tmp_dir, "batch.mol2")
+        with open(smi_file, "w", encoding="utf-8") as f:
+            f.writelines(f"{clean_smiles(smiles)}\t{name}\n" for (smiles, _), name in zip(molecules, names))
+        
+        # obabel -ismi batch.smi -omol2 -O batch.mol2 --gen3D -e
+        # (-e: go on with the next SMILES after an invalid one, instead of dropping the rest of the batch)
+        command = [obabel_cmd, "-ismi", smi_file, "-omol2", "-O", combined_file, "--gen3D", "-e"]
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Error converting a batch of {len(molecules)} SMILES. Command: {command}\nError: {e}")
+            return []
+        
+        with open(combined_file, "rb") as f:
+            combined = f.read()
+    
+    mol2_files = []
+    for record in combined.split(_MOL2_MOLECULE)[1:]:
+        # The molecule name is the line right after the @<TRIPOS>MOLECULE tag
+        title = record.split(b"\n", 2)[1].strip().decode("utf-8")
+        output_filename = os.path.join(output_dir, f"{title}.mol2")
+        with open(output_filename, "wb") as f:
+            f.write(_MOL2_MOLECULE + record)
+        logging.debug(f"Converted and saved: {output_filename}")
+        mol2_files.append(output_filename)
+    
+    # Molecules that OpenBabel could not read are simply missing from its output
+    converted = set(mol2_files)
+    for (smiles, name), sanitized_name in zip(molecules, names):
+        if os.path.join(output_dir, f"{sanitized_name}.mol2") not in converted:
+            logging.error(f"Error converting SMILES {smiles} for {name}")
+    
+    return mol2_files
+
+def convert_smiles_batch_to_mol2(molecules: list,
+                                 output_dir: str,
+                                 obabel_cmd: str = "obabel",
+                                 jobs: int = None,
+                                 backend: str = "obabel") -> list:
+    """
+    Convert many SMILES strings to MOL2 files, running one OpenBabel process per batch
+    of molecules instead of one per molecule.
+    
+    With the "rdkit" backend the molecules are converted one by one in-process
+    (see convert_smiles_to_mol2), on a pool of threads.
+    
+    Args:
+        molecules: List of (smiles, name) pairs.
+        output_dir: Directory where the MOL2 files will be saved.
+        obabel_cmd: Command for OpenBabel, can be modified if needed.
+        jobs: Number of batches converted in parallel (default: number of CPU cores).
+        backend: Tool generating the 3D coordinates, "obabel" (default) or "rdkit".
+    
+    Returns:
+        A list of paths to the generated MOL2 (or, with the "rdkit" backend, MOL) files.
+    """
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    
+    # Ensure the output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+    if not molecules:
+        return []
+    
+    if backend == "rdkit":
+        # Fail here rather than once per molecule when the optional package is missing
+        try:
+            import rdkit  # noqa: F401
+        except ImportError:
+            logging.error("The rdkit backend needs the RDKit package: pip install rdkit")
+            raise
+        
+        # RDKit releases the GIL while embedding, so threads convert the molecules in parallel
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            results = executor.map(lambda molecule: _convert_single(*molecule, output_dir, obabel_cmd, backend),
+                                   molecules)
+            return [path for path in results if path is not None]
+    
+    # One batch per job, so that all the cores take part in the 3D generation
+    n_batches = min(jobs or os.cpu_count(), len(molecules))
+    batches = [molecules[i::n_batches] for i in range(n_batches)]
+    
+    with ThreadPoolExecutor(max_workers=n_batches) as executor:
+        results = executor.map(lambda batch: _convert_batch(batch, output_dir, obabel_cmd), batches)
+        mol2_files = [path for paths in results for path in paths]
+    
+    return mol2_files
+
 def convert_from_excel(file_path: str,
                        smiles_column_index: int = 1,
                        name_column_index: int = 0,
                        output_dir: str = 'mol2_files',
-                       obabel_cmd: str = "obabel") -> list:
+                       obabel_cmd: str = "obabel",
+                       jobs: int = None,
+                       backend: str = "obabel") -> list:
     """
     Read an Excel file, extract the SMILES and names, and convert them to MOL2 files.
     
@@ -61,35 +252,31 @@ def convert_from_excel(file_path: str,
         name_column_index: Zero-based index of the column containing molecule names.
         output_dir: Directory where MOL2 files will be stored.
         obabel_cmd: Command to invoke OpenBabel.
+        jobs: Number of OpenBabel batches to run in parallel (default: number of CPU cores).
+        backend: Tool generating the 3D coordinates, "obabel" (default) or "rdkit".
     
     Returns:
-        A list of paths to the generated MOL2 files.
+        A list of paths to the generated MOL2 (or, with the "rdkit" backend, MOL) files.
     """
-    df = pd.read_excel(file_path)
-    mol2_files = []
+    # Only read the two columns in use (read_excel returns them in file order, whatever the order of usecols)
+    usecols = sorted({smiles_column_index, name_column_index})
+    df = pd.read_excel(file_path, usecols=usecols)
+    df = df.iloc[:, [usecols.index(smiles_column_index), usecols.index(name_column_index)]]
+    df.columns = ["smiles", "name"]
+    df["smiles"] = df["smiles"].astype("string").str.strip()
     
-    for index, row in df.iterrows():
-        # Extract the SMILES string and molecule name
-        smiles = str(row[smiles_column_index]).strip()
-        name = row[name_column_index]
-        
-        # Skip rows with missing or invalid data
-        if pd.isna(smiles) or pd.isna(name) or not smiles or not name:
-            logging.warning(f"Invalid data at row {index}: SMILES='{smiles}', Name='{name}'")
-            continue
-        
-        logging.debug(f"Row {index} - SMILES: {smiles}, Name: {name}")
-        
-        try:
-            output_file = convert_smiles_to_mol2(smiles, name, output_dir, obabel_cmd)
-            mol2_files.append(output_file)
-        except Exception as e:
-            logging.error(f"Failed to convert row {index}: {e}")
+    # Skip rows with missing or invalid data (checked on whole columns rather than row by row)
+    valid = (df["smiles"].fillna("") != "") & df["name"].notna() & (df["name"].astype(str).str.strip() != "")
+    for index, smiles, name in df[~valid].itertuples(name=None):
+        logging.warning(f"Invalid data at row {index}: SMILES='{smiles}', Name='{name}'")
     
-    return mol2_files
+    molecules = list(df[valid].itertuples(index=False, name=None))
+    
+    return convert_smiles_batch_to_mol2(molecules, output_dir, obabel_cmd, jobs, backend)
 
 if __name__ == '__main__':
     import argparse
+    from virtual_screening.utils import positive_int
 
     # Set up command-line argument parsing for testing or standalone runs
     parser = argparse.ArgumentParser(description="Convert SMILES from an Excel file to MOL2 files.")
@@ -98,6 +285,8 @@ if __name__ == '__main__':
     parser.add_argument("--name_col", type=int, default=0, help="Column index for molecule names (0-indexed).")
     parser.add_argument("--output_dir", default="mol2_files", help="Directory for saving generated MOL2 files.")
     parser.add_argument("--obabel_cmd", default="obabel", help="Command for invoking OpenBabel.")
+    parser.add_argument("--jobs", type=positive_int, default=None, help="Number of OpenBabel batches to run in parallel (default: number of CPU cores).")
+    parser.add_argument("--backend", choices=["obabel", "rdkit"], default="obabel", help="Tool generating the 3D coordinates (default: obabel).")
     args = parser.parse_args()
 
     # Set up basic logging configuration
@@ -109,6 +298,8 @@ if __name__ == '__main__':
                                          smiles_column_index=args.smiles_col,
                                          name_column_index=args.name_col,
                                          output_dir=args.output_dir,
-                                         obabel_cmd=args.obabel_cmd)
+                                         obabel_cmd=args.obabel_cmd,
+                                         jobs=args.jobs,
+                                         backend=args.backend)
     
     logging.info(f"Conversion complete. Generated files: {files_generated}")
@@ -1,8 +1,9 @@
 import os
 import pandas as pd
-import csv
 import logging
 
+from virtual_screening.utils import IO_BUFFER_SIZE
+
 def load_smiles(csv_file: str, delimiter: str = ',', header: int = 0) -> pd.DataFrame:
     """
     Load a CSV file containing molecule names and SMILES strings and return a DataFrame.
@@ -19,13 +20,10 @@ def load_smiles(csv_file: str, delimiter: str = ',', header: int = 0) -> pd.Data
     Returns:
         pd.DataFrame: A DataFrame with two columns: 'name' and 'smiles'.
     """
-    # Read the CSV file using pandas
-    df = pd.read_csv(csv_file, delimiter=delimiter, header=header)
-    
-    # Use only the first two columns, and rename them for clarity
-    df = df.iloc[:, :2]
-    df.columns = ['name', 'smiles']
-    print(df)
+    # Read only the first two columns with the C parser, naming them for clarity,
+    # and keep them as strings to skip dtype inference
+    df = pd.read_csv(csv_file, delimiter=delimiter, header=header, usecols=[0, 1],
+                     names=['name', 'smiles'], dtype=str, engine='c')
     return df
 
 # docking_results is a list
@@ -48,17 +46,16 @@ def save_results(docking_results, output_folder):
     output_file = os.path.join(output_folder, "docking_results.csv")
     
     try:
-        with open(output_file, "w", newline='', encoding="utf-8") as csvfile:
+        with open(output_file, "w", newline='', encoding="utf-8", buffering=IO_BUFFER_SIZE) as csvfile:
             # If the results list is non-empty, use its keys as header. Otherwise, use default headers.
             if docking_results:
                 fieldnames = list(docking_results[0].keys())
             else:
                 fieldnames = ["ligand", "binding_energy"]
             
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for result in docking_results:
-                writer.writerow(result)
+            # Build the table once and let pandas' C writer serialize it
+            df = pd.DataFrame(docking_results, columns=fieldnames)
+            df.to_csv(csvfile, index=False)
         
         logging.info("Docking results successfully saved to: %s", output_file)
     except Exception as e:
@@ -1,12 +1,90 @@
 # virtual_screening/box_calculator.py
 
+import mmap
+import os
+
+import numpy as np
+
+# PDB/PDBQT coordinates live in fixed columns: 31-38 (x), 39-46 (y) and 47-54 (z).
+# E.g., for:
+# "ATOM      1  C   LIG A   1      14.982   8.851  32.647  0.00  0.00    +0.034 C"
+# the fields are b'  14.982', b'   8.851' and b'  32.647'.
+_COORD_START = 30
+_COORD_END = 54
+
+def _parse_coordinates(lines: list) -> list:
+    """
+    Extract the x, y, z coordinates of the ATOM/HETATM lines one line at a time,
+    slicing the fixed coordinate columns. Lines where the conversion fails are skipped.
+    """
+    coords = []
+    for line in lines:
+        if line.startswith("ATOM") or line.startswith("HETATM"):
+            try:
+                coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+            except ValueError:
+                continue  # Skip lines where conversion fails (e.g. truncated records)
+    return coords
+
+def _startswith(buf: np.ndarray, starts: np.ndarray, prefix: bytes) -> np.ndarray:
+    """
+    Return a boolean mask telling which of the lines beginning at `starts` begin with `prefix`.
+    """
+    mask = np.ones(starts.size, dtype=bool)
+    for offset, byte in enumerate(prefix):
+        mask &= buf[starts + offset] == byte
+    return mask
+
+def _scan_coordinates(content) -> np.ndarray:
+    """
+    Scan the raw content of a PDBQT file (bytes or a memory map, read without
+    copying) and return the ATOM/HETATM coordinates as an Nx3 array.
+
+    The whole scan runs inside NumPy: the lines are located from the newline
+    positions, the records are selected by comparing their first bytes, and the
+    fixed-width coordinate fields are converted to floats in a single call.
+
+    Raises:
+        ValueError: If a coordinate record is truncated or one of its fields
+                    cannot be converted to a float.
+    """
+    buf = np.frombuffer(content, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [buf.size]))
+
+    # Lines shorter than "HETATM" cannot hold a record: leaving them out keeps every index inside the buffer
+    candidates = (ends - starts) >= 6
+    is_atom = np.zeros(starts.size, dtype=bool)
+    is_atom[candidates] = (_startswith(buf, starts[candidates], b"ATOM")
+                           | _startswith(buf, starts[candidates], b"HETATM"))
+    records = starts[is_atom]
+
+    if np.any(ends[is_atom] - records < _COORD_END):
+        raise ValueError("Truncated ATOM/HETATM record.")
+
+    fields = buf[records[:, None] + np.arange(_COORD_START, _COORD_END)]
+    return fields.view("S8").astype(np.float64)
+
+def _read_coordinates(content) -> np.ndarray:
+    """
+    Return the ATOM/HETATM coordinates of the PDBQT content (bytes or a memory map)
+    as an Nx3 array.
+    """
+    try:
+        return _scan_coordinates(content)
+    except ValueError:
+        # At least one record is malformed: parse line by line, skipping the bad ones
+        lines = content[:].decode(errors="ignore").splitlines()
+        return np.asarray(_parse_coordinates(lines), dtype=np.float64)
+
 def calculate_docking_box(pdbqt_file: str, padding: float) -> dict:
     """
     Calculate the center and dimensions of a docking box that encloses 
     the protein contained in the given PDBQT file, with extra padding (in angstroms).
 
-    The function reads ATOM/HETATM lines, extracts the x, y, z coordinates,
-    and then computes:
+    The function scans the ATOM/HETATM lines, extracts the x, y, z coordinates
+    into a NumPy array, and then computes:
       - center_x, center_y, center_z: The midpoint of the min and max for each coordinate.
       - size_x, size_y, size_z: The extent (max - min) for each axis plus the extra padding.
     
@@ -20,44 +98,21 @@ def calculate_docking_box(pdbqt_file: str, padding: float) -> dict:
         dict: A dictionary with keys:
               'center_x', 'center_y', 'center_z', 'size_x', 'size_y', 'size_z'
     """
-    min_x = min_y = min_z = float('inf')
-    max_x = max_y = max_z = float('-inf')
-
-    with open(pdbqt_file, 'r') as f:
-        for line in f:
-            # Only process lines that contain coordinate data.
-            if line.startswith("ATOM") or line.startswith("HETATM"):
-                fields = line.split()
-                try:
-                    # For standard PDBQT files, the coordinates are typically 
-                    # in positions 7, 8, and 9 (0-indexed) after splitting.
-                    # E.g., for: 
-                    # "ATOM      1  C   LIG A   1      14.982   8.851  32.647  0.00  0.00    +0.034 C"
-                    # fields becomes:
-                    # ['ATOM', '1', 'C', 'LIG', 'A', '1', '14.982', '8.851', '32.647', ...]
-                    x = float(fields[6])
-                    y = float(fields[7])
-                    z = float(fields[8])
-                except (IndexError, ValueError):
-                    continue  # Skip lines where conversion fails
-
-                if x < min_x:
-                    min_x = x
-                if x > max_x:
-                    max_x = x
-                if y < min_y:
-                    min_y = y
-                if y > max_y:
-                    max_y = y
-                if z < min_z:
-                    min_z = z
-                if z > max_z:
-                    max_z = z
+    with open(pdbqt_file, 'rb') as f:
+        # Map the file rather than reading it into memory (an empty file cannot be mapped)
+        if os.fstat(f.fileno()).st_size == 0:
+            xyz = np.empty((0, 3))
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                xyz = _read_coordinates(content)
 
     # Ensure that at least one valid coordinate set was found.
-    if min_x == float('inf'):
+    if xyz.size == 0:
         raise ValueError("No valid ATOM or HETATM lines found in the file.")
 
+    min_x, min_y, min_z = xyz.min(axis=0).tolist()
+    max_x, max_y, max_z = xyz.max(axis=0).tolist()
+
     # Compute the center coordinates.
     center_x = (min_x + max_x) / 2.0
     center_y = (min_y + max_y) / 2.0
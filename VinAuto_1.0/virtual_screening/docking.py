@@ -1,6 +1,372 @@
 import os
+import hashlib
 import subprocess
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from virtual_screening.utils import IO_BUFFER_SIZE
+
+# Ligands docked by a single Vina process. Windows caps a command line at 32767
+# characters, so a batch is also cut before its ligand paths get that long.
+_MAX_BATCH_SIZE = 500
+_MAX_BATCH_CHARS = 30000
+
+# Seconds between two checks of the running Vina processes, a batch takes minutes
+_POLL_INTERVAL = 0.1
+
+# "exe" runs the Vina executable, "python" docks in-process with the Vina Python API (the optional vina package)
+_ENGINES = ("exe", "python")
+
+# Vina writes the best pose first, its REMARK VINA RESULT record is within the first lines of the file
+_RESULT_HEAD_SIZE = 4096
+
+# Written to out_folder: the docking parameters of the poses it holds, checked before they are reused
+_FINGERPRINT_FILE = "docking_parameters.txt"
+
+@dataclass(frozen=True)
+class DockCfg:
+    """
+    Docking parameters shared by every ligand (the arguments of run_docking).
+
+    The Vina arguments that do not depend on the ligands are built once, when the
+    configuration is created: maps_argv computes the affinity maps (written at
+    maps_prefix), and argv_static is shared by every docking batch.
+    """
+    receptor: str
+    center_x: float
+    center_y: float
+    center_z: float
+    size_x: float
+    size_y: float
+    size_z: float
+    num_modes: int
+    exhaustiveness: int
+    spacing: float
+    ligand_folder: str
+    out_folder: str
+    vina_exe: str
+    cpu: int
+    maps_prefix: str = field(init=False)
+    maps_argv: tuple = field(init=False)
+    argv_static: tuple = field(init=False)
+
+    def __post_init__(self):
+        # The dataclass is frozen: the derived fields are set once, here
+        maps_prefix = os.path.join(self.out_folder, "maps", os.path.splitext(os.path.basename(self.receptor))[0])
+        object.__setattr__(self, "maps_prefix", maps_prefix)
+        # The AutoDock .map format needs an even number of voxels per dimension
+        object.__setattr__(self, "maps_argv", (
+            "--receptor", self.receptor,
+            "--center_x", str(self.center_x),
+            "--center_y", str(self.center_y),
+            "--center_z", str(self.center_z),
+            "--size_x", str(self.size_x),
+            "--size_y", str(self.size_y),
+            "--size_z", str(self.size_z),
+            "--spacing", str(self.spacing),
+            "--force_even_voxels",
+            "--write_maps", maps_prefix
+        ))
+        # The receptor and the docking box come with the maps
+        object.__setattr__(self, "argv_static", (
+            "--maps", maps_prefix,
+            "--num_modes", str(self.num_modes),
+            "--exhaustiveness", str(self.exhaustiveness),
+            "--cpu", str(self.cpu),
+            "--dir", self.out_folder,
+            "--batch"
+        ))
+
+def _split_batches(ligand_files: list, ligand_folder: str, jobs: int) -> list:
+    """
+    Split the ligands into the batches given to each Vina process.
+
+    The ligands are dealt round-robin: as they come sorted from the largest, every
+    batch gets a similar share of the large (slow to dock) and small ligands.
+
+    Args:
+        ligand_files: Names of the ligand files (in PDBQT format) inside ligand_folder.
+        ligand_folder: Folder containing the ligand files.
+        jobs: Number of Vina processes run in parallel; small screens are split so that all of them get work.
+
+    Returns:
+        A list of batches, each a list of ligand file names.
+    """
+    if not ligand_files:
+        return []
+    # Largest batch keeping the command line short enough even with the longest ligand path
+    max_path_chars = len(ligand_folder) + max(len(ligand_file) for ligand_file in ligand_files) + 2
+    max_batch_size = max(1, min(_MAX_BATCH_SIZE, _MAX_BATCH_CHARS // max_path_chars))
+    n_batches = max(min(jobs, len(ligand_files)), -(-len(ligand_files) // max_batch_size))
+    return [ligand_files[i::n_batches] for i in range(n_batches)]
+
+def _read_binding_energy(output_file: str) -> str:
+    """
+    Extract the binding energy of the best pose from a Vina output file.
+
+    Args:
+        output_file: Path to the docked poses (in PDBQT format) written by Vina.
+
+    Returns:
+        The binding energy (kcal/mol) as written by Vina, or None if it could not be found.
+    """
+    try:
+        with open(output_file, "rb") as f_out:
+            head = f_out.read(_RESULT_HEAD_SIZE)
+        start = head.find(b"REMARK VINA RESULT:")
+        if start != -1:
+            parts = head[start:].split(b"\n", 1)[0].split()
+            if len(parts) >= 4:
+                return parts[3].decode("ascii")
+    except Exception as e:
+        logging.error(f"Error reading {output_file}: {e}")
+    return None
+
+def _run_fingerprint(cfg: DockCfg) -> str:
+    """
+    Describe everything the docked poses depend on: the receptor, the box, num_modes and exhaustiveness.
+
+    The receptor is identified by its path, size and content hash rather than its modification
+    time, since the pipeline writes the receptor PDBQT again (identically) on every run.
+
+    Args:
+        cfg: Docking parameters shared by every ligand.
+
+    Returns:
+        The fingerprint, one "name value" line per parameter.
+    """
+    with open(cfg.receptor, "rb", buffering=IO_BUFFER_SIZE) as f:
+        receptor_data = f.read()
+    # The parameters may come as strings from the command line: compare them as numbers
+    parameters = (
+        ("receptor", os.path.abspath(cfg.receptor)),
+        ("receptor_size", len(receptor_data)),
+        ("receptor_sha256", hashlib.sha256(receptor_data).hexdigest()),
+        ("center", " ".join(repr(float(value)) for value in (cfg.center_x, cfg.center_y, cfg.center_z))),
+        ("size", " ".join(repr(float(value)) for value in (cfg.size_x, cfg.size_y, cfg.size_z))),
+        ("spacing", repr(float(cfg.spacing))),
+        ("num_modes", int(cfg.num_modes)),
+        ("exhaustiveness", int(cfg.exhaustiveness)),
+    )
+    return "".join(f"{name} {value}\n" for name, value in parameters)
+
+def _write_maps(cfg: DockCfg):
+    """
+    Compute the Vina affinity maps of the receptor over the docking box once (at cfg.maps_prefix),
+    so that the ligands are docked against them instead of recomputing the grid every time.
+
+    Args:
+        cfg: Docking parameters shared by every ligand.
+    """
+    os.makedirs(os.path.dirname(cfg.maps_prefix), exist_ok=True)
+
+    vina_command = (cfg.vina_exe,) + cfg.maps_argv
+
+    logging.debug(f"Running command: {' '.join(vina_command)}")
+
+    try:
+        subprocess.run(vina_command, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Vina failed to compute the affinity maps of {cfg.receptor}: {e.stderr}")
+        raise
+
+def _start_batch(batch_index: int, ligand_files: list, cfg: DockCfg) -> subprocess.Popen:
+    """
+    Start a single Vina process docking a batch of ligands (Vina's --batch mode), without waiting for it.
+
+    Args:
+        batch_index: Number of the batch, used to name its Vina log.
+        ligand_files: Names of the ligand files (in PDBQT format) inside cfg.ligand_folder.
+        cfg: Docking parameters shared by every ligand.
+
+    Returns:
+        The running Vina process, or None if it could not be started.
+    """
+    ligand_prefix = cfg.ligand_folder + os.sep
+    vina_log_file = f"{cfg.out_folder}{os.sep}docking_batch_{batch_index}.log"
+
+    vina_command = (cfg.vina_exe,) + cfg.argv_static + tuple(ligand_prefix + ligand_file for ligand_file in ligand_files)
+
+    logging.debug(f"Running command: {' '.join(vina_command)}")
+
+    try:
+        # Vina writes the detailed log of the batch, and its errors, straight into the file
+        # (the process keeps its own handle on it, so it is closed here right away)
+        with open(vina_log_file, "wb", buffering=IO_BUFFER_SIZE) as f_log:
+            return subprocess.Popen(vina_command, stdout=f_log, stderr=subprocess.STDOUT)
+    except Exception as e:
+        logging.error(f"Exception while running Vina for batch {batch_index}: {e}")
+        return None
+
+def _finish_batch(batch_index: int, ligand_files: list, cfg: DockCfg, returncode: int) -> tuple:
+    """
+    Collect the results of a batch whose Vina process has exited, and extract their binding energies.
+
+    Vina docks the ligands of a batch in order and stops at the first one it cannot dock:
+    when it failed, that ligand is the first without poses. It is reported as failed, and
+    the ligands after it, which Vina never reached, are returned to be docked again.
+
+    Args:
+        batch_index: Number of the batch.
+        ligand_files: Names of the ligand files docked by the batch.
+        cfg: Docking parameters shared by every ligand.
+        returncode: Exit code of the Vina process.
+
+    Returns:
+        A (results, retry_files) tuple: results is a list of (ligand_file, binding_energy) tuples,
+        where binding_energy is None if the docking failed, and retry_files lists the ligands
+        left undocked because Vina stopped before them.
+    """
+    out_prefix = cfg.out_folder + os.sep
+
+    if returncode != 0:
+        logging.error(f"Vina failed for batch {batch_index} (exit code {returncode}), "
+                      f"see {out_prefix}docking_batch_{batch_index}.log")
+
+    results = []
+    retry_files = []
+    failed_ligand = None
+    for ligand_file in ligand_files:
+        # Vina names the poses <ligand>_out.pdbqt, keep the docking_<ligand>.pdbqt naming of the results
+        # (every ligand file name ends with the 6 characters of ".pdbqt")
+        base_name = ligand_file[:-6]
+        output_file = out_prefix + "docking_" + base_name + ".pdbqt"
+        try:
+            os.replace(out_prefix + base_name + "_out.pdbqt", output_file)
+        except FileNotFoundError:
+            if failed_ligand is not None:
+                retry_files.append(ligand_file)
+                continue
+            if returncode != 0:
+                failed_ligand = ligand_file
+            logging.warning(f"No docking result for ligand {ligand_file}.")
+            results.append((ligand_file, None))
+            continue
+        except OSError as e:
+            logging.error(f"Could not save the docking result of ligand {ligand_file}: {e}")
+            results.append((ligand_file, None))
+            continue
+        results.append((ligand_file, _read_binding_energy(output_file)))
+    docked = sum(binding_energy is not None for _, binding_energy in results)
+    logging.info(f"Docking finished for batch {batch_index}: {docked} of {len(results)} ligands docked")
+    return results, retry_files
+
+def _run_batches(batches: list, cfg: DockCfg, jobs: int) -> list:
+    """
+    Dock every batch, keeping up to `jobs` Vina processes running at once.
+
+    The processes are started with Popen and polled from this single thread: as soon
+    as one exits, its results are collected and the next batch is started.
+
+    The ligands a failed batch did not reach are docked again in a new batch. When that
+    batch fails too, and neither of them docked any ligand, Vina itself is failing
+    (bad maps or arguments, out of memory...) rather than a ligand, and docking stops.
+
+    Args:
+        batches: Batches of ligand file names, as returned by _split_batches.
+        cfg: Docking parameters shared by every ligand.
+        jobs: Maximum number of Vina processes running at once.
+
+    Returns:
+        A list of (ligand_file, binding_energy) tuples, where binding_energy is None if the docking failed.
+
+    Raises:
+        RuntimeError: If a batch of remaining ligands failed without docking any ligand,
+                      after the batch it came from did not dock any ligand either.
+    """
+    # (batch_index, ligand_files, whether the batch holds the remaining ligands of a batch that docked nothing)
+    waiting = [(batch_index, ligand_files, False) for batch_index, ligand_files in enumerate(batches)]
+    waiting.reverse()
+    next_index = len(batches)
+    running = {}
+    results = []
+    try:
+        while waiting or running:
+            while waiting and len(running) < jobs:
+                batch_index, ligand_files, after_empty_batch = waiting.pop()
+                process = _start_batch(batch_index, ligand_files, cfg)
+                if process is None:
+                    results += [(ligand_file, None) for ligand_file in ligand_files]
+                else:
+                    running[process] = (batch_index, ligand_files, after_empty_batch)
+
+            for process in [process for process in running if process.poll() is not None]:
+                batch_index, ligand_files, after_empty_batch = running.pop(process)
+                batch_results, retry_files = _finish_batch(batch_index, ligand_files, cfg, process.returncode)
+                results += batch_results
+                empty_batch = all(binding_energy is None for _, binding_energy in batch_results)
+                if process.returncode != 0 and empty_batch and after_empty_batch:
+                    # Re-queuing the rest would only start one more failing Vina process per ligand
+                    message = (f"Vina failed again without docking any ligand in batch {batch_index}, "
+                               f"see {cfg.out_folder}{os.sep}docking_batch_{batch_index}.log")
+                    logging.error(message)
+                    raise RuntimeError(message)
+                if retry_files:
+                    # The ligands Vina did not reach go back in a new batch, started next
+                    logging.info(f"Docking the {len(retry_files)} remaining ligands of batch {batch_index} "
+                                 f"in batch {next_index}")
+                    waiting.append((next_index, retry_files, empty_batch))
+                    next_index += 1
+
+            if running:
+                time.sleep(_POLL_INTERVAL)
+    finally:
+        # On any error (or interruption), do not leave Vina processes writing into out_folder
+        for process in running:
+            process.kill()
+        for process in running:
+            process.wait()
+    return results
+
+def _dock_chunk_api(ligand_files: list, cfg: DockCfg) -> list:
+    """
+    Dock a chunk of ligands with the Vina Python API, in a worker process.
+
+    The receptor is loaded and its affinity maps computed once, then every ligand
+    of the chunk is docked against them, without starting any Vina process.
+
+    Args:
+        ligand_files: Names of the ligand files (in PDBQT format) inside cfg.ligand_folder.
+        cfg: Docking parameters shared by every ligand, cfg.cpu is the number of CPUs given to this Vina instance.
+
+    Returns:
+        A list of (ligand_file, binding_energy) tuples, where binding_energy is None if the docking failed.
+    """
+    from vina import Vina
+
+    v = Vina(sf_name="vina", cpu=cfg.cpu, verbosity=0)
+    v.set_receptor(cfg.receptor)
+    v.compute_vina_maps(center=[cfg.center_x, cfg.center_y, cfg.center_z],
+                        box_size=[cfg.size_x, cfg.size_y, cfg.size_z],
+                        spacing=float(cfg.spacing))
+
+    # The API wants numbers, while the command line options may come as strings
+    exhaustiveness = int(cfg.exhaustiveness)
+    num_modes = int(cfg.num_modes)
+    ligand_prefix = cfg.ligand_folder + os.sep
+    out_prefix = cfg.out_folder + os.sep
+    results = []
+    for ligand_file in ligand_files:
+        output_file = out_prefix + "docking_" + ligand_file[:-6] + ".pdbqt"
+        # Write the poses under a temporary name first, so that a run killed while writing
+        # never leaves a partial docking_<ligand>.pdbqt that a resumed run would skip
+        partial_file = output_file + ".part"
+        try:
+            v.set_ligand_from_file(ligand_prefix + ligand_file)
+            v.dock(exhaustiveness=exhaustiveness, n_poses=num_modes)
+            v.write_poses(partial_file, n_poses=num_modes, overwrite=True)
+            os.replace(partial_file, output_file)
+        except Exception as e:
+            logging.error(f"Vina failed for ligand {ligand_file} with error: {e}")
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+            results.append((ligand_file, None))
+            continue
+        # Read back from the poses, so that the energy is formatted as with the Vina executable
+        results.append((ligand_file, _read_binding_energy(output_file)))
+    return results
 
 def run_docking(
     receptor: str,
@@ -16,11 +382,28 @@ def run_docking(
     ligand_folder: str,
     out_folder: str,
     log_file: str,
-    vina_exe: str
+    vina_exe: str,
+    jobs: int = None,
+    force: bool = False,
+    engine: str = "exe"
 ) -> list:
     """
     Perform docking using Vina on all ligand files in a specified folder.
 
+    The affinity maps of the receptor are computed once, then the ligands are split into
+    batches, each docked against the maps by a single Vina process (Vina's --batch mode).
+    Several Vina processes run at once: the CPUs are split evenly between the concurrent
+    runs (each run gets cpu_count // jobs of them).
+
+    With the "python" engine, the ligands are instead docked with the Vina Python API:
+    they are split into one chunk per job, each docked by a worker process holding a
+    single Vina instance (see _dock_chunk_api), and vina_exe is not used.
+
+    Ligands whose poses are already in out_folder (from a previous, interrupted run)
+    are not docked again unless force is set, their binding energy is read from the poses.
+    The poses are only reused when the previous run had the same receptor, box, num_modes
+    and exhaustiveness (see _run_fingerprint), otherwise every ligand is docked again.
+
     Args:
         receptor: Path to the receptor file in PDBQT format.
         center_x, center_y, center_z: Coordinates of the grid center.
@@ -32,91 +415,126 @@ def run_docking(
         out_folder: Folder where docking results will be stored.
         log_file: Path to the global log file for summarizing binding energies.
         vina_exe: Path to the Vina executable.
+        jobs: Number of Vina runs executed in parallel (default: number of CPU cores).
+        force: Dock every ligand, even the ones already docked by a previous run.
+        engine: How Vina is run, "exe" (default, the Vina executable) or "python" (the vina package).
 
     Returns:
         A list of dictionaries summarizing results (each with 'ligand' and 'binding_energy').
     """
+    if engine not in _ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be at least 1, got {jobs}")
+    if engine == "python":
+        # Fail here rather than in every worker process when the optional package is missing
+        try:
+            import vina  # noqa: F401
+        except ImportError:
+            logging.error("The python engine needs the Vina Python API: pip install vina")
+            raise
+
+    # The receptor is only read when the maps are computed:
+    # check it up front, before listing or docking any ligand
+    if not os.path.isfile(receptor):
+        logging.error(f"Receptor file not found: {receptor}")
+        raise FileNotFoundError(f"Receptor file not found: {receptor}")
+    if os.path.getsize(receptor) == 0:
+        logging.error(f"Receptor file is empty: {receptor}")
+        raise ValueError(f"Receptor file is empty: {receptor}")
+
     # Create the output directory if necessary
     if not os.path.exists(out_folder):
         os.makedirs(out_folder)
-    docking_results = []
-
-    # Open the global log file to record summary results
-    with open(log_file, "w", encoding="utf-8") as summary_log:
-        summary_log.write("Ligand\tBinding Energy (kcal/mol)\n")
-
-        # Process each ligand file in the folder
-        for ligand_file in os.listdir(ligand_folder):
-            if ligand_file.lower().endswith(".pdbqt"):
-                ligand_path = os.path.join(ligand_folder, ligand_file)
-                base_name = os.path.splitext(ligand_file)[0]
-                output_file = os.path.join(out_folder, f"docking_{base_name}.pdbqt")
-                vina_log_file = os.path.join(out_folder, f"docking_{base_name}.log")
-
-                # Build the Vina command
-                vina_command = [
-                    vina_exe,
-                    "--receptor", receptor,
-                    "--ligand", ligand_path,
-                    "--out", output_file,
-                    "--center_x", str(center_x),
-                    "--center_y", str(center_y),
-                    "--center_z", str(center_z),
-                    "--size_x", str(size_x),
-                    "--size_y", str(size_y),
-                    "--size_z", str(size_z),
-                    "--num_modes", str(num_modes),
-                    "--exhaustiveness", str(exhaustiveness),
-                    "--spacing", str(spacing)
-                ]
-
-                logging.info(f"Running command: {' '.join(vina_command)}")
-
-                try:
-                    result = subprocess.run(
-                        vina_command,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        check=False
-                    )
-                    if result.returncode != 0:
-                        logging.error(f"Vina failed for ligand {ligand_file} with error: {result.stderr}")
-                        continue
-
-                    # Write the detailed Vina log for this ligand
-                    with open(vina_log_file, "w", encoding="utf-8") as f_log:
-                        f_log.write(result.stdout)
-
-                    logging.info(f"Docking completed for ligand {ligand_file}")
-                except Exception as e:
-                    logging.error(f"Exception while running Vina for {ligand_file}: {e}")
-                    continue
-
-                # Extract binding energy from the Vina log
-                binding_energy = None
-                if os.path.exists(vina_log_file) and os.path.getsize(vina_log_file) > 0:
-                    try:
-                        with open(vina_log_file, "r", encoding="utf-8") as f_log:
-                            for line in f_log:
-                                if line.startswith("REMARK VINA RESULT:"):
-                                    parts = line.split()
-                                    if len(parts) >= 4:
-                                        binding_energy = parts[3]
-                                    break
-                    except Exception as e:
-                        logging.error(f"Error reading {vina_log_file}: {e}")
-                else:
-                    logging.warning(f"Log file {vina_log_file} is empty or missing.")
 
-                if binding_energy is not None:
-                    summary_log.write(f"{ligand_file}\t{binding_energy}\n")
-                    docking_results.append({"ligand": ligand_file, "binding_energy": binding_energy})
-    logging.info(f"Docking completed. Results saved in: {out_folder}")
+    jobs = jobs or os.cpu_count()
+    cfg = DockCfg(
+        receptor=receptor,
+        center_x=center_x,
+        center_y=center_y,
+        center_z=center_z,
+        size_x=size_x,
+        size_y=size_y,
+        size_z=size_z,
+        num_modes=num_modes,
+        exhaustiveness=exhaustiveness,
+        spacing=spacing,
+        ligand_folder=ligand_folder,
+        out_folder=out_folder,
+        vina_exe=vina_exe,
+        cpu=max(1, os.cpu_count() // jobs)
+    )
+
+    with os.scandir(ligand_folder) as entries:
+        ligand_entries = [(entry.stat().st_size, entry.name) for entry in entries
+                          if entry.name.endswith((".pdbqt", ".PDBQT"))]
+    # Largest ligands (the longest to dock) first, in a deterministic order: spread evenly
+    # over the batches and chunks, they keep one worker from finishing long after the others
+    ligand_entries.sort(reverse=True)
+    ligand_files = [ligand_file for _, ligand_file in ligand_entries]
+
+    # Sizes of the poses already written, from a single listing of the output folder
+    with os.scandir(out_folder) as entries:
+        docked_sizes = {entry.name: entry.stat().st_size for entry in entries if entry.name.startswith("docking_")}
+    output_names = ["docking_" + ligand_file[:-6] + ".pdbqt" for ligand_file in ligand_files]
+
+    fingerprint = _run_fingerprint(cfg)
+    fingerprint_file = os.path.join(out_folder, _FINGERPRINT_FILE)
+    try:
+        with open(fingerprint_file, "r") as f:
+            previous_fingerprint = f.read()
+    except FileNotFoundError:
+        previous_fingerprint = None
+    if force or previous_fingerprint != fingerprint:
+        # The poses in out_folder were docked with other parameters (or are to be docked again):
+        # remove them before recording the new parameters, so that an interrupted run never
+        # leaves them to be reused as results of the new parameters
+        stale_names = [output_name for output_name in output_names if output_name in docked_sizes]
+        if stale_names and not force:
+            logging.warning(f"The poses in {out_folder} were docked with another receptor, box, num_modes "
+                            f"or exhaustiveness: docking the {len(stale_names)} ligands again.")
+        for output_name in stale_names:
+            os.remove(os.path.join(out_folder, output_name))
+        docked_sizes = {}
+        with open(fingerprint_file, "w") as f:
+            f.write(fingerprint)
+
+    results = []
+    pending_files = []
+    for ligand_file, output_name in zip(ligand_files, output_names):
+        if docked_sizes.get(output_name, 0) > 0:
+            results.append((ligand_file, _read_binding_energy(os.path.join(out_folder, output_name))))
+        else:
+            pending_files.append(ligand_file)
+    if results:
+        logging.info(f"Skipping {len(results)} ligands already docked by a previous run.")
+
+    if pending_files and engine == "python":
+        # Each worker process loads the receptor and computes the maps once, then docks its whole chunk
+        n_chunks = min(jobs, len(pending_files))
+        chunks = [pending_files[i::n_chunks] for i in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+            chunk_results = executor.map(_dock_chunk_api, chunks, [cfg] * n_chunks)
+            results += [result for chunk_result in chunk_results for result in chunk_result]
+    elif pending_files:
+        _write_maps(cfg)
+        batches = _split_batches(pending_files, ligand_folder, jobs)
+        results += _run_batches(batches, cfg, jobs)
+
+    docking_results = [{"ligand": ligand_file, "binding_energy": binding_energy}
+                       for ligand_file, binding_energy in results if binding_energy is not None]
+
+    # Record the summary results from here only, so that the workers never share the log file,
+    # and in a single write
+    with open(log_file, "w", encoding="utf-8", newline="\n", buffering=IO_BUFFER_SIZE) as summary_log:
+        summary_log.write("Ligand\tBinding Energy (kcal/mol)\n" + "".join(
+            f"{result['ligand']}\t{result['binding_energy']}\n" for result in docking_results))
+    logging.info(f"Docked {len(docking_results)} of {len(ligand_files)} ligands. Results saved in: {out_folder}")
     return docking_results
 
 if __name__ == "__main__":
     import argparse
+    from virtual_screening.utils import positive_int
 
     parser = argparse.ArgumentParser(description="Run docking with Vina on a set of ligand files.")
     parser.add_argument("--receptor", required=True, help="Path to receptor file in PDBQT format.")
@@ -133,6 +551,9 @@ if __name__ == "__main__":
     parser.add_argument("--out_folder", required=True, help="Folder to store docking results.")
     parser.add_argument("--log_file", required=True, help="Path to global log file for summary results.")
     parser.add_argument("--vina_exe", required=True, help="Path to the Vina executable.")
+    parser.add_argument("--jobs", type=positive_int, default=None, help="Number of Vina runs executed in parallel (default: number of CPU cores).")
+    parser.add_argument("--force", action="store_true", help="Dock every ligand, even the ones already docked by a previous run.")
+    parser.add_argument("--engine", choices=_ENGINES, default="exe", help="Run the Vina executable (exe, default) or the Vina Python API (python).")
 
     args = parser.parse_args()
 
@@ -152,5 +573,8 @@ if __name__ == "__main__":
         ligand_folder=args.ligand_folder,
         out_folder=args.out_folder,
         log_file=args.log_file,
-        vina_exe=args.vina_exe
+        vina_exe=args.vina_exe,
+        jobs=args.jobs,
+        force=args.force,
+        engine=args.engine
     )
@@ -3,14 +3,35 @@
 import logging
 import argparse
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the various modules of our package
 from virtual_screening import data_io, docking, utils, dock_box
 from virtual_screening.converters import smiles_to_mol2, pdb_to_pdbqt, mol2_to_pdbqt, clean_pdbqt, normalize_format
 
-def run_pipeline(input_csv, receptor_file, output_dir, num_poses, exhaust, padding):
+# Default installation path of Vina on Windows, used when Vina cannot be found otherwise
+_DEFAULT_VINA_EXE = r"C:\Program Files (x86)\The Scripps Research Institute\Vina\vina_1.2.5_win.exe"
+
+def _find_vina_exe(vina_exe=None):
+    """
+    Locate the Vina executable.
+
+    Args:
+        vina_exe: Path to the Vina executable, if given explicitly.
+
+    Returns:
+        vina_exe if given, else the VINA_EXE environment variable if set, else the
+        vina executable found on the PATH, else the default Windows installation path.
+    """
+    return vina_exe or os.environ.get("VINA_EXE") or shutil.which("vina") or _DEFAULT_VINA_EXE
+
+def run_pipeline(input_csv, receptor_file, output_dir, num_poses, exhaust, padding, jobs=None, backend="obabel", force=False, engine="exe", vina_exe=None, ligand_prep="obabel"):
     # Set up logging for the whole pipeline
     utils.setup_logging()
+    # Checked up front, rather than by run_docking once every conversion has run
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be at least 1, got {jobs}")
     logging.info("Starting virtual screening pipeline.")
 
     # Step 1: Load SMILES data from the CSV file
@@ -21,26 +42,24 @@ def run_pipeline(input_csv, receptor_file, output_dir, num_poses, exhaust, paddi
     # Step 2: Convert SMILES to mol2 format files
     logging.info("Converting SMILES to mol2 files.")
 
-    # Loop over the rows (or use any DataFrame operations) (smiles data is a pd dataframe)
+    # (smiles, name) pairs of the rows (smiles data is a pd dataframe)
     # the dir of the mol2 files is created in the current dir
     mol2_dir = os.path.join(str(output_dir), "mol2_files")
-    for index, row in smiles_data.iterrows():
-        print(f"Molecule: {row['name']}, SMILES: {row['smiles']}")
-        smile = row['smiles']
-        name = row['name']
-        cleaned_smile = smiles_to_mol2.clean_smiles(smile)
-        mol2file = smiles_to_mol2.convert_smiles_to_mol2(cleaned_smile, name, mol2_dir,  "obabel")
-
+    molecules = list(smiles_data[["smiles", "name"]].itertuples(index=False, name=None))
+    # The SMILES are converted in a few obabel batches rather than one obabel process per molecule,
+    # and the batches (or, with the rdkit backend, the molecules) run in parallel on `jobs` threads
+    mol2_files = smiles_to_mol2.convert_smiles_batch_to_mol2(molecules, mol2_dir, "obabel", jobs, backend)
+    logging.info(f"Converted {len(mol2_files)} of {len(molecules)} molecules.")
 
     # Step 3: Convert the mol2 files to pdbqt format (for docking)
     logging.info("Converting mol2 files to pdbqt format.")
-    cmdline = ["obabel", "-imol2", "-opdbqt"]
+    # obabel picks the input format from the file extension (.mol2, or .mol with the rdkit backend)
+    cmdline = ["obabel", "-opdbqt"]
     ligands_pdbqt = os.path.join(str(output_dir), "ligands_pdbqt")
-    pdbqt_files = mol2_to_pdbqt.convert_mol2_to_pdbqt(mol2_dir, ligands_pdbqt, cmdline)
-
-    # Step 3bis: convert the pdbqt files into Vina-compatible files
-    for file in pdbqt_files:
-        clean_pdbqt.rename_ligand_residue(file)
+    # The pdbqt files are made Vina-compatible (UNL residue renamed to LIG) before being written
+    pdbqt_files = mol2_to_pdbqt.convert_mol2_to_pdbqt(mol2_dir, ligands_pdbqt, cmdline, jobs, ligand_prep,
+                                                      post_transform=clean_pdbqt.rename_residue_bytes)
+    logging.info(f"Generated {len(pdbqt_files)} ligand pdbqt files.")
 
     #Step 4: Convert the pdb file into a pdbqt file
     logging.info("converting pdb protein to pdbqt")
@@ -48,16 +67,14 @@ def run_pipeline(input_csv, receptor_file, output_dir, num_poses, exhaust, paddi
     receptor_pdbqt = pdb_to_pdbqt.convert_pdb_to_pdbqt(receptor_file, out_rec, "obabel", None)
 
     # Step 5: Run docking for each pdbqt file using VINA
-    from virtual_screening import docking
-
     log = os.path.join(str(output_dir), "docking_global_log.log")
     o_fold = os.path.join(str(output_dir), "docking_results")
 
     # 10 is the padding (extra box space in angrstong)
     box = dock_box.calculate_docking_box(receptor_pdbqt, padding)
-    print("Calculated Docking Box:")
-    print(f"Center (x, y, z): {box['center_x']:.3f}, {box['center_y']:.3f}, {box['center_z']:.3f}")
-    print(f"Dimensions (x, y, z): {box['size_x']:.3f}, {box['size_y']:.3f}, {box['size_z']:.3f}")
+    logging.info("Calculated Docking Box:")
+    logging.info(f"Center (x, y, z): {box['center_x']:.3f}, {box['center_y']:.3f}, {box['center_z']:.3f}")
+    logging.info(f"Dimensions (x, y, z): {box['size_x']:.3f}, {box['size_y']:.3f}, {box['size_z']:.3f}")
     
     docking_results = docking.run_docking(
         receptor=receptor_pdbqt,
@@ -73,19 +90,23 @@ def run_pipeline(input_csv, receptor_file, output_dir, num_poses, exhaust, paddi
         ligand_folder = ligands_pdbqt,
         out_folder = o_fold,
         log_file = log,
-        vina_exe=r"C:\Program Files (x86)\The Scripps Research Institute\Vina\vina_1.2.5_win.exe"
+        vina_exe=_find_vina_exe(vina_exe),
+        jobs=jobs,
+        force=force,
+        engine=engine
     )
 
     #data_io.save_results(docking_results, output_dir)
     logging.info("Pipeline finished successfully.")
 
     # Step 6: Convert pdbqt results to a more Windows-friendly format
-    for file_name in os.listdir(o_fold):
-        file_path = os.path.join(o_fold, file_name)
+    with os.scandir(o_fold) as entries:
         # Optionally, check the file extension (e.g., only normalize .pdbqt files)
-        if file_name.lower().endswith(".pdbqt"):
-            normalize_format.normalize_pdbqt_format(file_path)
-            print(f"Normalized: {file_path}")
+        result_paths = [entry.path for entry in entries if entry.name.endswith((".pdbqt", ".PDBQT"))]
+    # Each file is read, converted and rewritten independently: threads overlap the file I/O
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        for path in executor.map(normalize_format.normalize_pdbqt_format, result_paths):
+            logging.debug(f"Normalized: {path}")
             
 
 if __name__ == "__main__":
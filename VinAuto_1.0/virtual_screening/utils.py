@@ -1,5 +1,24 @@
+import argparse
 import logging
 
+# Buffer size used for reading and writing (multi-MB) PDBQT files
+IO_BUFFER_SIZE = 1 << 20
+
+def positive_int(value: str) -> int:
+    """
+    argparse type for the --jobs options: an integer of at least 1.
+    
+    Args:
+        value (str): The command-line value.
+    
+    Returns:
+        int: The parsed value.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
 def setup_logging():
     logging.basicConfig(level=logging.INFO,
                         format="%(asctime)s [%(levelname)s] %(message)s")